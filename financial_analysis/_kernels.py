@@ -0,0 +1,181 @@
+"""
+Numeric kernels for the metric calculations.
+
+Kernels are compiled with Numba when it is installed and run as plain Python
+otherwise. Missing values are passed as NaN rather than None so that the
+kernels stay in nopython mode. `error_model="numpy"` makes division by zero
+produce inf/NaN instead of raising, and `nnan`/`ninf` are left out of the
+fastmath flags so that missing values still propagate correctly.
+"""
+
+import math
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+    prange = range
+
+
+_FASTMATH = {"nsz", "arcp", "contract", "afn", "reassoc"}
+
+
+@njit(cache=True, fastmath=_FASTMATH, parallel=True, error_model="numpy")
+def zscore(out, wc, re, oi, mc, tl, rev, ta):
+    """Altman Z-Score per ticker, written into `out`; weights match ALTMAN_COEFFICIENTS."""
+    for i in prange(out.size):
+        out[i] = (1.2 * wc[i] + 1.4 * re[i] + 3.3 * oi[i] + 1.0 * rev[i]) / ta[
+            i
+        ] + 0.6 * mc[i] / tl[i]
+
+
+# Order of the values returned by `ratios`.
+RATIO_NAMES = (
+    "gross_margin",
+    "operating_margin",
+    "net_profit_margin",
+    "roa",
+    "roe",
+    "debt_to_equity",
+    "interest_coverage",
+    "peg_ratio",
+    "forward_pe",
+    "price_to_sales",
+    "price_to_free_cash_flow",
+    "ev_to_ebitda",
+    "asset_turnover",
+)
+
+
+@njit(cache=True)
+def safe_div(num, den):
+    """num / den, or NaN when either side is missing or the denominator is zero."""
+    if den == 0.0 or den != den or num != num:
+        return math.nan
+    return num / den
+
+
+@njit(cache=True)
+def ratios(
+    revenue,
+    cogs,
+    operating_income,
+    net_income,
+    total_assets,
+    total_equity,
+    total_liabilities,
+    interest_expense,
+    ebitda,
+    operating_cash_flow,
+    capital_expenditures,
+    trailing_pe,
+    earnings_growth,
+    price,
+    forward_eps,
+    market_cap,
+    enterprise_value,
+):
+    """Single-ticker ratios in RATIO_NAMES order; inputs and missing outputs are NaN."""
+    return (
+        safe_div(revenue - cogs, revenue),
+        safe_div(operating_income, revenue),
+        safe_div(net_income, revenue),
+        safe_div(net_income, total_assets),
+        safe_div(net_income, total_equity),
+        safe_div(total_liabilities, total_equity),
+        safe_div(operating_income, interest_expense),
+        safe_div(trailing_pe, earnings_growth),
+        safe_div(price, forward_eps),
+        safe_div(market_cap, revenue),
+        safe_div(market_cap, operating_cash_flow - capital_expenditures),
+        safe_div(enterprise_value, ebitda),
+        safe_div(revenue, total_assets),
+    )
+
+
+@njit(cache=True)
+def percentile(values, q):
+    """
+    np.percentile with its default linear interpolation, located by quickselect
+    (np.partition, O(n)) instead of a full sort.
+    """
+    position = q / 100.0 * (values.size - 1)
+    lower_rank = int(math.floor(position))
+    upper_rank = min(lower_rank + 1, values.size - 1)
+    partitioned = np.partition(values, upper_rank)
+    upper = partitioned[upper_rank]
+    # Everything before upper_rank is <= upper, so its maximum is the next rank down.
+    lower = partitioned[:upper_rank].max() if upper_rank > lower_rank else upper
+    return lower + (upper - lower) * (position - lower_rank)
+
+
+@njit(cache=True, error_model="numpy")
+def risk(returns, aligned_returns, aligned_market, var_percentile, z_score, daily_rf):
+    """
+    Risk metrics of a daily return series: historical VaR, parametric VaR, CVaR,
+    Sharpe, Sortino, beta and market correlation.
+
+    Apart from the VaR percentile, every statistic comes out of one pass over
+    `returns` (Welford mean/variance plus the tail and downside sums) and one
+    over the returns aligned with the market, for beta and correlation.
+    """
+    n = returns.size
+    var_historical = percentile(returns, var_percentile)
+
+    mean = 0.0
+    m2 = 0.0
+    tail_sum = 0.0
+    tail_count = 0
+    downside_sq = 0.0
+    downside_count = 0
+    for i in range(n):
+        x = returns[i]
+        delta = x - mean
+        mean += delta / (i + 1)
+        m2 += delta * (x - mean)
+        if x <= var_historical:
+            tail_sum += x
+            tail_count += 1
+        excess = x - daily_rf
+        if excess < 0.0:
+            downside_sq += excess * excess
+            downside_count += 1
+
+    # Sample standard deviation (ddof=1); shifting by daily_rf leaves it unchanged.
+    std = math.sqrt(safe_div(m2, n - 1.0))
+    excess_mean = mean - daily_rf
+    annualize = math.sqrt(252.0)
+
+    mean_r = 0.0
+    mean_m = 0.0
+    m2_r = 0.0
+    m2_m = 0.0
+    co_moment = 0.0
+    for i in range(aligned_returns.size):
+        r = aligned_returns[i]
+        m = aligned_market[i]
+        delta_r = r - mean_r
+        mean_r += delta_r / (i + 1)
+        delta_m = m - mean_m
+        mean_m += delta_m / (i + 1)
+        m2_r += delta_r * (r - mean_r)
+        m2_m += delta_m * (m - mean_m)
+        co_moment += delta_r * (m - mean_m)
+
+    return (
+        var_historical,
+        mean - z_score * std,
+        safe_div(tail_sum, tail_count),
+        annualize * safe_div(excess_mean, std),
+        annualize
+        * safe_div(excess_mean, math.sqrt(safe_div(downside_sq, downside_count))),
+        safe_div(co_moment, m2_m),
+        safe_div(co_moment, math.sqrt(m2_r * m2_m)),
+    )
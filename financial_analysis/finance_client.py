@@ -1,8 +1,114 @@
-import yfinance as yf
-import pandas as pd
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import functools
+import os
+import sys
+import threading
+from typing import Dict, TYPE_CHECKING
 import time
 import logging
 
+# yfinance, pandas and requests are imported on first use so that importing
+# this module stays cheap for callers that never fetch.
+if TYPE_CHECKING:
+    import numpy as np
+    import requests
+
+logger = logging.getLogger(__name__)
+
+
+# Size of the HTTP connection pool and of the per-ticker fan-out pool.
+_MAX_WORKERS = 32
+
+# Attributes fetched for every ticker; each one is a separate HTTP round-trip
+# inside yfinance, so they are requested concurrently.
+_STATEMENTS = ("balance_sheet", "financials", "cashflow")
+_FIELDS = _STATEMENTS + ("info",)
+
+# On-disk HTTP cache for Yahoo responses; set YF_NO_CACHE to always fetch fresh data.
+_CACHE_NAME = "yf_cache.sqlite"
+_CACHE_EXPIRE_AFTER = 3600
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    """
+    Build the session shared by all tickers so that concurrent requests reuse
+    pooled keep-alive connections, backed by the on-disk cache when available.
+
+    yfinance 0.2.54 and later depend on curl_cffi and reject any other
+    session, so a curl_cffi session is built whenever curl_cffi is installed.
+    The on-disk response cache only applies to older yfinance releases, which
+    take plain requests sessions; price histories are cached separately (see
+    risk_metrics_calculator._load_history).
+    """
+    try:
+        from curl_cffi import requests as curl_requests
+    except ImportError:
+        curl_requests = None
+
+    if curl_requests is not None:
+        return curl_requests.Session(impersonate="chrome")
+
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    try:
+        from requests_cache import CachedSession
+    except ImportError:
+        CachedSession = None
+
+    if CachedSession is not None and not os.environ.get("YF_NO_CACHE"):
+        session = CachedSession(
+            _CACHE_NAME,
+            backend="sqlite",
+            expire_after=_CACHE_EXPIRE_AFTER,
+            allowable_methods=("GET", "POST"),
+        )
+    else:
+        session = requests.Session()
+
+    adapter = HTTPAdapter(pool_connections=_MAX_WORKERS, pool_maxsize=_MAX_WORKERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _get_session() -> requests.Session:
+    """Return the shared session, building it on first use."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            _SESSION = _build_session()
+        return _SESSION
+
+
+@functools.lru_cache(maxsize=8)
+def _build_tickers(symbols: tuple):
+    """Build the yf.Tickers for a ticker universe, reused by clients asking for the same set."""
+    import yfinance as yf
+
+    return yf.Tickers(" ".join(symbols), session=_get_session())
+
+
+def _to_columns(statement) -> Dict[str, np.ndarray]:
+    """
+    Convert a yfinance statement into a label -> per-period values dict.
+
+    The rows are views into a single array, so this costs one conversion per
+    statement and lookups never go through pandas indexing again. Labels are
+    interned to match the alias tuples in metrics_calculator.ROW_KEYS.
+    """
+    import pandas as pd
+
+    if not isinstance(statement, pd.DataFrame) or statement.empty:
+        return {}
+    return dict(zip(map(sys.intern, statement.index), statement.to_numpy()))
+
 
 class FinanceClient:
     def __init__(self, tickers: list):
@@ -10,7 +116,59 @@ class FinanceClient:
         Initialize FinanceClient to handle multiple tickers.
         Uses yf.Tickers to batch fetch data for all provided tickers.
         """
-        self.tickers_obj = yf.Tickers(" ".join(tickers))
+        self.tickers_obj = _build_tickers(tuple(sorted(set(tickers))))
+        # Seconds each ticker's latest fetch spent in worker threads; time spent
+        # queued for a worker or backing off between retries is excluded
+        self.latencies: Dict[str, float] = {}
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Drop all cached Yahoo responses so the next fetch goes to the network."""
+        # yf.Ticker objects keep the data they fetched, so rebuild them as well
+        _build_tickers.cache_clear()
+        if _SESSION is not None and hasattr(_SESSION, "cache"):
+            _SESSION.cache.clear()
+
+    @staticmethod
+    def _fetch_once(stock):
+        """
+        Fetch the statements and info of a yfinance Ticker concurrently.
+
+        Returns:
+        Tuple: balance_sheet, financials, cashflow (label -> values dicts), info
+        """
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(_FIELDS)
+        ) as executor:
+            futures = [executor.submit(getattr, stock, field) for field in _FIELDS]
+            values = [future.result() for future in futures]
+
+        # Log fetched data types for debugging
+        logger.debug(
+            f"Fetched raw data for {stock.ticker}: {', '.join(str(type(v)) for v in values)}"
+        )
+
+        balance_sheet, financials, cashflow = (
+            _to_columns(value) for value in values[:3]
+        )
+        info = values[3] if values[3] is not None else {}
+        return balance_sheet, financials, cashflow, info
+
+    def _fetch_timed(self, ticker: str, stock):
+        """_fetch_once, adding the time it takes to self.latencies[ticker]."""
+        # Runs in the worker thread, so the clock starts once a worker is free
+        start = time.monotonic()
+        try:
+            return self._fetch_once(stock)
+        finally:
+            self.latencies[ticker] += time.monotonic() - start
+
+    @staticmethod
+    def _backoff(attempt: int, delay: float) -> None:
+        """Sleep for an exponentially growing interval measured on the monotonic clock."""
+        deadline = time.monotonic() + delay * 2**attempt
+        while (remaining := deadline - time.monotonic()) > 0:
+            time.sleep(remaining)
 
     def get_financial_data(self, ticker: str, retries=2, delay=2):
         """
@@ -19,58 +177,108 @@ class FinanceClient:
         Args:
         ticker (str): The stock ticker symbol.
         retries (int): Number of times to retry if data is incomplete.
-        delay (int): Delay between retries in seconds.
+        delay (int): Initial delay between retries in seconds, doubled on every retry.
 
         Returns:
-        Tuple: balance_sheet, financials, cashflow, info (all are either pd.DataFrame or dict)
+        Tuple: balance_sheet, financials, cashflow, info (statements are label -> values dicts)
         """
         attempt = 0
+        info = {}
+        self.latencies[ticker] = 0.0
         while attempt <= retries:
             try:
                 stock = self.tickers_obj.tickers[ticker.upper()]
-
-                # Log fetched data types for debugging
-                logging.debug(
-                    f"Fetched raw data for {ticker}: {type(stock.balance_sheet)}, {type(stock.financials)}, {type(stock.cashflow)}"
+                balance_sheet, financials, cashflow, info = self._fetch_timed(
+                    ticker, stock
                 )
 
-                # Fetch financial data
-                balance_sheet = (
-                    stock.balance_sheet
-                    if isinstance(stock.balance_sheet, pd.DataFrame)
-                    else pd.DataFrame()
-                )
-                financials = (
-                    stock.financials
-                    if isinstance(stock.financials, pd.DataFrame)
-                    else pd.DataFrame()
-                )
-                cashflow = (
-                    stock.cashflow
-                    if isinstance(stock.cashflow, pd.DataFrame)
-                    else pd.DataFrame()
-                )
-                info = stock.info or {}
-
                 # Check if any data exists and return
-                if (
-                    not balance_sheet.empty
-                    or not financials.empty
-                    or not cashflow.empty
-                ):
+                if balance_sheet or financials or cashflow:
                     return balance_sheet, financials, cashflow, info
 
-                # Log retry attempt
-                logging.warning(
-                    f"Incomplete data for {ticker}. Retrying... (Attempt {attempt + 1}/{retries})"
-                )
-                time.sleep(delay)
+                # Log the retry and back off, unless this was the last attempt
+                if attempt < retries:
+                    logger.warning(
+                        f"Incomplete data for {ticker}. Retrying... (Retry {attempt + 1}/{retries})"
+                    )
+                    self._backoff(attempt, delay)
                 attempt += 1
 
             except Exception as e:
-                logging.error(f"Error fetching data for {ticker}: {e}")
-                return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), {}
+                logger.error(f"Error fetching data for {ticker}: {e}")
+                return {}, {}, {}, {}
 
         # If retries failed, log and return empty data
-        logging.error(f"Data still incomplete for {ticker} after {retries} retries.")
-        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), info
+        logger.error(f"Data still incomplete for {ticker} after {retries} retries.")
+        return {}, {}, {}, info
+
+    def get_many(self, tickers: list) -> Dict[str, tuple]:
+        """
+        Fetch financial data for several tickers in parallel.
+
+        Args:
+        tickers (list): The stock ticker symbols, all of which must have been
+            passed to the constructor.
+
+        Returns:
+        Dict: ticker -> (balance_sheet, financials, cashflow, info)
+        """
+        workers = max(1, min(_MAX_WORKERS, len(tickers)))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(zip(tickers, executor.map(self.get_financial_data, tickers)))
+
+    async def get_financial_data_async(self, ticker: str, retries=2, delay=2):
+        """
+        Asynchronous variant of get_financial_data.
+
+        The blocking yfinance calls run in a worker thread and the retry backoff
+        uses asyncio.sleep, so other tickers keep fetching while one waits.
+
+        Args:
+        ticker (str): The stock ticker symbol.
+        retries (int): Number of times to retry if data is incomplete.
+        delay (int): Initial delay between retries in seconds, doubled on every retry.
+
+        Returns:
+        Tuple: balance_sheet, financials, cashflow, info (statements are label -> values dicts)
+        """
+        info = {}
+        self.latencies[ticker] = 0.0
+        for attempt in range(retries + 1):
+            try:
+                stock = self.tickers_obj.tickers[ticker.upper()]
+                balance_sheet, financials, cashflow, info = await asyncio.to_thread(
+                    self._fetch_timed, ticker, stock
+                )
+            except Exception as e:
+                logger.error(f"Error fetching data for {ticker}: {e}")
+                return {}, {}, {}, {}
+
+            if balance_sheet or financials or cashflow:
+                return balance_sheet, financials, cashflow, info
+
+            if attempt < retries:
+                logger.warning(
+                    f"Incomplete data for {ticker}. Retrying... (Retry {attempt + 1}/{retries})"
+                )
+                await asyncio.sleep(delay * 2**attempt)
+
+        logger.error(f"Data still incomplete for {ticker} after {retries} retries.")
+        return {}, {}, {}, info
+
+    async def get_many_async(self, tickers: list) -> Dict[str, tuple]:
+        """
+        Fetch financial data for several tickers concurrently on the event loop.
+
+        Args:
+        tickers (list): The stock ticker symbols, all of which must have been
+            passed to the constructor. They are dispatched in this order, so
+            listing the slowest first keeps them from extending the tail.
+
+        Returns:
+        Dict: ticker -> (balance_sheet, financials, cashflow, info)
+        """
+        results = await asyncio.gather(
+            *(self.get_financial_data_async(ticker) for ticker in tickers)
+        )
+        return dict(zip(tickers, results))
@@ -1,290 +1,674 @@
-from dataclasses import dataclass
-from typing import Optional, List, Union, Dict, Any
-import pandas as pd
-from .utils import handle_api_errors
-
+from __future__ import annotations
 
-@dataclass
+import math
+import sys
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Optional, List, Tuple, Union, Dict, Any, TYPE_CHECKING
+import numpy as np
+from .utils import memoize_on_instance
+from . import _kernels
+
+# pandas is only needed by the batch path and for DataFrame inputs, so it is
+# imported where used.
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Altman Z-Score weights for working capital, retained earnings, operating
+# income and revenue, each scaled by total assets.
+ALTMAN_COEFFICIENTS = np.array([1.2, 1.4, 3.3, 1.0])
+ALTMAN_MARKET_CAP_COEFFICIENT = 0.6
+
+
+def altman_z_score(components, total_assets, market_cap, total_liabilities):
+    """
+    Compute Altman Z-Scores for one ticker or a batch of tickers.
+
+    Args:
+    components: Working capital, retained earnings, operating income and revenue,
+        shaped (4,) for one ticker or (N, 4) for N tickers.
+    total_assets, market_cap, total_liabilities: Scalars or arrays of shape (N,).
+
+    Returns:
+    A float, or an array of shape (N,) for a batch.
+    """
+    components = np.asarray(components, dtype=np.float64)
+    total_assets = np.asarray(total_assets, dtype=np.float64)
+    return (components / total_assets[..., None]) @ ALTMAN_COEFFICIENTS + (
+        ALTMAN_MARKET_CAP_COEFFICIENT
+        * np.asarray(market_cap, dtype=np.float64)
+        / np.asarray(total_liabilities, dtype=np.float64)
+    )
+
+
+# Positions of the statements in the tuple resolved against ROW_KEYS.
+BALANCE_SHEET, FINANCIALS, CASHFLOW = 0, 1, 2
+
+
+def _labels(*names: str) -> Tuple[str, ...]:
+    """
+    Intern statement labels, as FinanceClient does, so that alias lookups
+    compare by identity instead of character by character.
+    """
+    return tuple(map(sys.intern, names))
+
+
+# Statement rows: canonical name -> (statement, labels in order of preference).
+# Each name is resolved to a single value once per ticker.
+ROW_KEYS = {
+    "revenue": (FINANCIALS, _labels("Total Revenue")),
+    "cogs": (FINANCIALS, _labels("Cost Of Revenue")),
+    "operating_income": (FINANCIALS, _labels("Operating Income")),
+    "net_income": (FINANCIALS, _labels("Net Income")),
+    "interest_expense": (FINANCIALS, _labels("Interest Expense")),
+    "ebitda": (FINANCIALS, _labels("EBITDA")),
+    "income_before_tax": (FINANCIALS, _labels("Income Before Tax")),
+    "total_assets": (BALANCE_SHEET, _labels("Total Assets")),
+    "total_liabilities": (
+        BALANCE_SHEET,
+        _labels(
+            "Total Liabilities Net Minority Interest",
+            "Total Liabilities",
+            "Total Liab",
+        ),
+    ),
+    "total_equity": (
+        BALANCE_SHEET,
+        _labels(
+            "Common Stock Equity", "Stockholders Equity", "Total Stockholder Equity"
+        ),
+    ),
+    "current_assets": (
+        BALANCE_SHEET,
+        _labels("Current Assets", "Total Current Assets"),
+    ),
+    "current_liabilities": (
+        BALANCE_SHEET,
+        _labels("Current Liabilities", "Total Current Liabilities"),
+    ),
+    "working_capital": (BALANCE_SHEET, _labels("Working Capital")),
+    "retained_earnings": (BALANCE_SHEET, _labels("Retained Earnings")),
+    "operating_cash_flow": (CASHFLOW, _labels("Operating Cash Flow")),
+    "capital_expenditures": (CASHFLOW, _labels("Capital Expenditure")),
+    "tax_paid": (
+        CASHFLOW,
+        _labels("Tax Paid", "Taxes Paid", "Income Tax Paid Supplemental Data"),
+    ),
+}
+
+# Every label looked up in each statement, indexed by BALANCE_SHEET/FINANCIALS/CASHFLOW.
+STATEMENT_LABELS = tuple(
+    tuple(
+        label
+        for source, labels in ROW_KEYS.values()
+        if source == statement
+        for label in labels
+    )
+    for statement in (BALANCE_SHEET, FINANCIALS, CASHFLOW)
+)
+
+# Numeric info fields used by the vectorized batch pipeline.
+INFO_KEYS = [
+    "marketCap",
+    "enterpriseValue",
+    "trailingPE",
+    "earningsQuarterlyGrowth",
+    "currentPrice",
+    "forwardEps",
+    "payoutRatio",
+]
+
+
+def _to_float(value: Any) -> float:
+    """Coerce a possibly missing input to float; missing values are carried as NaN."""
+    return math.nan if value is None else float(value)
+
+
+def _divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Element-wise division yielding NaN wherever the denominator is zero or missing."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator != 0, numerator / denominator, np.nan)
+
+
+# A financial statement, either as returned by yfinance or as the
+# label -> per-period values dict produced by FinanceClient.
+Statement = Union["pd.DataFrame", Dict[str, np.ndarray]]
+
+
+@dataclass(slots=True, frozen=True)
 class FinancialData:
-    balance_sheet: pd.DataFrame
-    financials: pd.DataFrame
-    cashflow: pd.DataFrame
+    balance_sheet: Statement
+    financials: Statement
+    cashflow: Statement
     info: Dict[str, Any]
 
 
+@dataclass(slots=True)
+class Info:
+    """The yfinance info fields used by MetricsCalculator, read as attributes."""
+
+    industry: Optional[str] = None
+    sector: Optional[str] = None
+    shortName: Optional[str] = None
+    currentPrice: Optional[float] = None
+    trailingPE: Optional[float] = None
+    forwardEps: Optional[float] = None
+    earningsQuarterlyGrowth: Optional[float] = None
+    marketCap: Optional[float] = None
+    enterpriseValue: Optional[float] = None
+    priceToBook: Optional[float] = None
+    dividendYield: Optional[float] = None
+    payoutRatio: Optional[float] = None
+    beta: Optional[float] = None
+    heldPercentInstitutions: Optional[float] = None
+    heldPercentInsiders: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, info: Dict[str, Any]) -> "Info":
+        # One C-level pass over the fields; absent keys come back as None.
+        return cls(*map(info.get, _INFO_FIELDS))
+
+
+_INFO_FIELDS = tuple(Info.__dataclass_fields__)
+
+
 class MetricsCalculator:
+    # Only the resolved line items and info are kept; the statements themselves
+    # are dropped once construction is done.
+    __slots__ = ("info", "_values", "_cache")
+
     def __init__(
         self,
-        balance_sheet: pd.DataFrame,
-        financials: pd.DataFrame,
-        cashflow: pd.DataFrame,
+        balance_sheet: Statement,
+        financials: Statement,
+        cashflow: Statement,
         info: dict,
     ) -> None:
-        self.data = FinancialData(balance_sheet, financials, cashflow, info)
+        self.info = Info.from_dict(info)
+        self._values = self._resolve(balance_sheet, financials, cashflow)
+        self._cache: Dict[str, Any] = {}
+
+    @staticmethod
+    def _first_column(source: Statement, labels: Tuple[str, ...]) -> Dict[str, Any]:
+        """
+        Flatten the most recent period of a statement into a label -> value dict.
+
+        For DataFrames only `labels` are extracted, resolved to row positions in
+        a single get_indexer call.
+        """
+        if isinstance(source, dict):
+            return {key: values[0] for key, values in source.items() if len(values)}
+        if source.empty:
+            return {}
+        column = source.iloc[:, 0].to_numpy()
+        if not source.index.is_unique:
+            return dict(zip(map(sys.intern, source.index), column))
+        positions = source.index.get_indexer(labels)
+        return {
+            label: column[position]
+            for label, position in zip(labels, positions)
+            if position >= 0
+        }
 
+    @staticmethod
     def _get_value(
-        self, source: pd.DataFrame, keys: List[str]
+        source: Dict[str, Any], keys: Tuple[str, ...]
     ) -> Optional[Union[float, int]]:
-        return next(
+        for key in keys:
+            value = source.get(key)
+            # NaN is the only value not equal to itself.
+            if value is not None and value == value:
+                return value
+        return None
+
+    @classmethod
+    def _resolve(
+        cls, balance_sheet: Statement, financials: Statement, cashflow: Statement
+    ) -> Dict[str, float]:
+        """Resolve every ROW_KEYS alias list to a single float (NaN if missing) for one ticker."""
+        return cls._resolve_maps(
             (
-                source.loc[key].iloc[0]
-                for key in keys
-                if key in source.index and not source.loc[key].empty
-            ),
-            None,
+                cls._first_column(balance_sheet, STATEMENT_LABELS[BALANCE_SHEET]),
+                cls._first_column(financials, STATEMENT_LABELS[FINANCIALS]),
+                cls._first_column(cashflow, STATEMENT_LABELS[CASHFLOW]),
+            )
         )
 
-    def _get_info_value(self, key: str) -> Optional[Union[float, int, str]]:
-        return self.data.info.get(key)
+    @classmethod
+    def _resolve_maps(cls, maps: Tuple[Dict[str, Any], ...]) -> Dict[str, float]:
+        """Resolve ROW_KEYS against label -> value dicts ordered as BALANCE_SHEET, FINANCIALS, CASHFLOW."""
+        # Tickers without any statement data (e.g. delisted) skip the alias probing.
+        if not any(maps):
+            return dict.fromkeys(ROW_KEYS, math.nan)
+        return {
+            name: _to_float(cls._get_value(maps[source], keys))
+            for name, (source, keys) in ROW_KEYS.items()
+        }
 
-    @handle_api_errors
-    def _get_balance_sheet_value(self, keys: List[str]) -> Optional[float]:
-        return self._get_value(self.data.balance_sheet, keys)
+    @classmethod
+    def from_raw(
+        cls,
+        balance_sheet: Dict[str, float],
+        financials: Dict[str, float],
+        cashflow: Dict[str, float],
+        info: Dict[str, Any],
+    ) -> "MetricsCalculator":
+        """
+        Build a calculator from flat label -> value dicts for the most recent period.
+
+        This skips statement handling entirely, so callers that already hold plain
+        values (e.g. parsed JSON) never need to build DataFrames or arrays.
+
+        Args:
+        balance_sheet, financials, cashflow (dict): statement label -> value.
+        info (dict): yfinance-style info dict.
+        """
+        calculator = cls.__new__(cls)
+        calculator.info = Info.from_dict(info)
+        calculator._values = cls._resolve_maps((balance_sheet, financials, cashflow))
+        calculator._cache = {}
+        return calculator
+
+    @classmethod
+    def batch(
+        cls, data: List[FinancialData], index: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Compute the ratio metrics for many tickers at once with NumPy column operations.
+
+        Args:
+        data (list): One FinancialData per ticker.
+        index (list): Optional labels (e.g. tickers) for the rows of the result.
+
+        Returns:
+        pd.DataFrame: One row per entry in `data`, NaN where a metric is unavailable.
+        """
+        import pandas as pd
+
+        values = np.full((len(data), len(ROW_KEYS)), np.nan)
+        for i, item in enumerate(data):
+            resolved = cls._resolve(item.balance_sheet, item.financials, item.cashflow)
+            values[i] = list(resolved.values())
+        col = dict(zip(ROW_KEYS, values.T))
+
+        info = np.array(
+            [[item.info.get(key) for key in INFO_KEYS] for item in data],
+            dtype=np.float64,
+        ).reshape(len(data), len(INFO_KEYS))
+        inf = dict(zip(INFO_KEYS, info.T))
+
+        revenue = col["revenue"]
+        total_assets = col["total_assets"]
+        total_equity = col["total_equity"]
+        total_liabilities = col["total_liabilities"]
+        operating_income = col["operating_income"]
+        market_cap = inf["marketCap"]
+
+        free_cash_flow = col["operating_cash_flow"] - col["capital_expenditures"]
+        roe = _divide(col["net_income"], total_equity)
+
+        effective_tax_rate = _divide(col["tax_paid"], col["income_before_tax"])
+        tax_rate = np.where(
+            np.isnan(effective_tax_rate) | (effective_tax_rate == 0),
+            0.25,
+            effective_tax_rate,
+        )
+        roic = _divide(
+            operating_income * (1 - tax_rate), total_equity + total_liabilities
+        )
 
-    @handle_api_errors
-    def _get_financials_value(self, keys: List[str]) -> Optional[float]:
-        return self._get_value(self.data.financials, keys)
+        altman_inputs = [
+            np.ascontiguousarray(a)
+            for a in (
+                col["working_capital"],
+                col["retained_earnings"],
+                operating_income,
+                market_cap,
+                total_liabilities,
+                revenue,
+                total_assets,
+            )
+        ]
+        z_score = np.empty(len(data))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            _kernels.zscore(z_score, *altman_inputs)
+        altman_valid = np.all(np.column_stack(altman_inputs) != 0, axis=1)
+
+        return pd.DataFrame(
+            {
+                "gross_margin": _divide(revenue - col["cogs"], revenue),
+                "operating_margin": _divide(operating_income, revenue),
+                "net_profit_margin": _divide(col["net_income"], revenue),
+                "roa": _divide(col["net_income"], total_assets),
+                "roe": roe,
+                "roic": roic,
+                "earnings_yield": _divide(col["net_income"], market_cap),
+                "current_ratio": _divide(
+                    col["current_assets"], col["current_liabilities"]
+                ),
+                "debt_to_equity": _divide(total_liabilities, total_equity),
+                "interest_coverage": _divide(
+                    operating_income, col["interest_expense"]
+                ),
+                "peg_ratio": _divide(
+                    inf["trailingPE"], inf["earningsQuarterlyGrowth"]
+                ),
+                "forward_pe": _divide(inf["currentPrice"], inf["forwardEps"]),
+                "price_to_sales": _divide(market_cap, revenue),
+                "price_to_free_cash_flow": _divide(market_cap, free_cash_flow),
+                "ev_to_ebitda": _divide(inf["enterpriseValue"], col["ebitda"]),
+                "sustainable_growth_rate": _divide(roe, 1 - inf["payoutRatio"]),
+                "altman_z_score": np.where(altman_valid, z_score, np.nan),
+                "asset_turnover": _divide(revenue, total_assets),
+                "free_cash_flow": free_cash_flow,
+                "effective_tax_rate": effective_tax_rate,
+            },
+            index=index,
+        )
 
-    @handle_api_errors
-    def _get_cashflow_value(self, keys: List[str]) -> Optional[float]:
-        return self._get_value(self.data.cashflow, keys)
+    @classmethod
+    def bulk(
+        cls,
+        balance_sheets: Dict[str, Statement],
+        financials: Dict[str, Statement],
+        cashflows: Dict[str, Statement],
+        infos: Dict[str, Dict[str, Any]],
+    ) -> pd.DataFrame:
+        """
+        Compute the ratio metrics for a screen of tickers keyed by symbol.
+
+        Args:
+        balance_sheets, financials, cashflows, infos (dict): ticker -> statement/info.
+            The tickers are taken from `balance_sheets`; a ticker missing from
+            another mapping is treated as having no data there.
+
+        Returns:
+        pd.DataFrame: One row per ticker, indexed by ticker.
+        """
+        tickers = list(balance_sheets)
+        data = [
+            FinancialData(
+                balance_sheets[ticker],
+                financials.get(ticker, {}),
+                cashflows.get(ticker, {}),
+                infos.get(ticker, {}),
+            )
+            for ticker in tickers
+        ]
+        return cls.batch(data, index=tickers)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Compute every metric in one pass, keyed by its display label."""
+        values = self._values
+        info = self.info
+        margins = self.all_margins()
+        return {
+            # Basic Metrics
+            "Revenue": values["revenue"],
+            "Operating Income": values["operating_income"],
+            "Net Income": values["net_income"],
+            "Total Assets": values["total_assets"],
+            "Total Liabilities": values["total_liabilities"],
+            "Total Equity": values["total_equity"],
+            # Profitability Metrics
+            "Gross Margin": margins["gross_margin"],
+            "Operating Margin": margins["operating_margin"],
+            "Net Profit Margin": margins["net_profit_margin"],
+            "ROA": margins["roa"],
+            "ROE": margins["roe"],
+            "ROIC": self.calculate_roic(),
+            # Leverage and Coverage Metrics
+            "Debt to Equity": margins["debt_to_equity"],
+            "Interest Coverage": margins["interest_coverage"],
+            # Market Metrics
+            "PE Ratio": info.trailingPE,
+            "PEG Ratio": margins["peg_ratio"],
+            "Forward PE": margins["forward_pe"],
+            "Price to Sales": margins["price_to_sales"],
+            "Price to Book": info.priceToBook,
+            "Price to Free Cash Flow": margins["price_to_free_cash_flow"],
+            "EV/EBITDA": margins["ev_to_ebitda"],
+            # Growth and Value Metrics
+            "Sustainable Growth Rate": self.calculate_sustainable_growth_rate(),
+            "Altman Z-Score": self.calculate_altman_z_score(),
+            # Other Important Metrics
+            "Beta": info.beta,
+            "Dividend Yield": info.dividendYield,
+            "Payout Ratio": info.payoutRatio,
+            "Asset Turnover": margins["asset_turnover"],
+            "Institutional Ownership": info.heldPercentInstitutions,
+            "Insider Ownership": info.heldPercentInsiders,
+        }
 
     # Basic Financial Data
     def get_industry(self) -> Optional[str]:
-        return self._get_info_value("industry")
+        return self.info.industry
 
     def get_sector(self) -> Optional[str]:
-        return self._get_info_value("sector")
+        return self.info.sector
 
     def get_short_name(self) -> Optional[str]:
-        return self._get_info_value("shortName")
+        return self.info.shortName
 
     def get_stock_price(self) -> Optional[float]:
-        return self._get_info_value("currentPrice")
+        return self.info.currentPrice
 
-    @handle_api_errors
-    def get_revenue(self) -> Optional[float]:
-        return self._get_financials_value(["Total Revenue"])
+    def get_revenue(self) -> float:
+        return self._values["revenue"]
 
-    @handle_api_errors
-    def get_operating_income(self) -> Optional[float]:
-        return self._get_financials_value(["Operating Income"])
+    def get_operating_income(self) -> float:
+        return self._values["operating_income"]
 
-    @handle_api_errors
-    def get_net_income(self) -> Optional[float]:
-        return self._get_financials_value(["Net Income"])
+    def get_net_income(self) -> float:
+        return self._values["net_income"]
 
-    @handle_api_errors
-    def get_total_assets(self) -> Optional[float]:
-        return self._get_balance_sheet_value(["Total Assets"])
+    def get_total_assets(self) -> float:
+        return self._values["total_assets"]
 
-    @handle_api_errors
-    def get_total_liabilities(self) -> Optional[float]:
-        return self._get_balance_sheet_value(
-            ["Total Liabilities Net Minority Interest", "Total Liabilities"]
-        )
+    def get_total_liabilities(self) -> float:
+        return self._values["total_liabilities"]
 
-    @handle_api_errors
-    def get_total_equity(self) -> Optional[float]:
-        return self._get_balance_sheet_value(
-            ["Common Stock Equity", "Stockholders Equity"]
-        )
+    def get_total_equity(self) -> float:
+        return self._values["total_equity"]
 
-    @handle_api_errors
-    def get_cogs(self) -> Optional[float]:
-        return self._get_financials_value(["Cost Of Revenue"])
+    def get_cogs(self) -> float:
+        return self._values["cogs"]
 
-    @handle_api_errors
-    def get_interest_expense(self) -> Optional[float]:
-        return self._get_financials_value(["Interest Expense"])
+    def get_interest_expense(self) -> float:
+        return self._values["interest_expense"]
 
-    @handle_api_errors
-    def get_operating_cash_flow(self) -> Optional[float]:
-        return self._get_cashflow_value(["Operating Cash Flow"])
+    def get_operating_cash_flow(self) -> float:
+        return self._values["operating_cash_flow"]
 
-    @handle_api_errors
-    def get_capital_expenditures(self) -> Optional[float]:
-        return self._get_cashflow_value(["Capital Expenditure"])
+    def get_capital_expenditures(self) -> float:
+        return self._values["capital_expenditures"]
 
     # Market Data
     def get_beta(self) -> Optional[float]:
-        return self._get_info_value("beta")
+        return self.info.beta
 
     def get_institutional_ownership(self) -> Optional[float]:
-        return self._get_info_value("heldPercentInstitutions")
+        return self.info.heldPercentInstitutions
 
     def get_insider_transactions(self) -> Optional[float]:
-        return self._get_info_value("heldPercentInsiders")
+        return self.info.heldPercentInsiders
 
     # Profitability Metrics
-    @handle_api_errors
     def calculate_margin(
         self, numerator: Optional[float], denominator: Optional[float]
-    ) -> Optional[float]:
-        if not all([numerator is not None, denominator is not None, denominator != 0]):
-            return None
-        return numerator / denominator
-
-    @handle_api_errors
-    def calculate_gross_margin(self) -> Optional[float]:
-        return self.calculate_margin(
-            self.get_revenue() - self.get_cogs(), self.get_revenue()
+    ) -> float:
+        return _kernels.safe_div(_to_float(numerator), _to_float(denominator))
+
+    @memoize_on_instance
+    def all_margins(self) -> Dict[str, float]:
+        """
+        Evaluate every simple numerator/denominator ratio in one compiled kernel call.
+
+        Returns:
+        Dict: ratio name -> value, NaN where an input is missing or the denominator is zero.
+        """
+        values = self._values
+        info = self.info
+        inputs = (
+            values["revenue"],
+            values["cogs"],
+            values["operating_income"],
+            values["net_income"],
+            values["total_assets"],
+            values["total_equity"],
+            values["total_liabilities"],
+            values["interest_expense"],
+            values["ebitda"],
+            values["operating_cash_flow"],
+            values["capital_expenditures"],
+            info.trailingPE,
+            info.earningsQuarterlyGrowth,
+            info.currentPrice,
+            info.forwardEps,
+            info.marketCap,
+            info.enterpriseValue,
+        )
+        return dict(
+            zip(_kernels.RATIO_NAMES, _kernels.ratios(*map(_to_float, inputs)))
         )
 
-    @handle_api_errors
-    def calculate_operating_margin(self) -> Optional[float]:
-        return self.calculate_margin(self.get_operating_income(), self.get_revenue())
-
-    @handle_api_errors
-    def calculate_net_profit_margin(self) -> Optional[float]:
-        return self.calculate_margin(self.get_net_income(), self.get_revenue())
+    def calculate_gross_margin(self) -> float:
+        return self.all_margins()["gross_margin"]
 
-    @handle_api_errors
-    def calculate_roa(self) -> Optional[float]:
-        return self.calculate_margin(self.get_net_income(), self.get_total_assets())
+    def calculate_operating_margin(self) -> float:
+        return self.all_margins()["operating_margin"]
 
-    @handle_api_errors
-    def calculate_roe(self) -> Optional[float]:
-        return self.calculate_margin(self.get_net_income(), self.get_total_equity())
+    def calculate_net_profit_margin(self) -> float:
+        return self.all_margins()["net_profit_margin"]
 
-    @handle_api_errors
-    def calculate_roic(self) -> Optional[float]:
-        operating_income = self.get_operating_income()
-        total_equity = self.get_total_equity()
-        total_debt = self.get_total_liabilities()
+    def calculate_roa(self) -> float:
+        return self.all_margins()["roa"]
 
-        if not all([operating_income, total_equity, total_debt]):
-            return None
+    def calculate_roe(self) -> float:
+        return self.all_margins()["roe"]
 
-        tax_rate = self.calculate_effective_tax_rate() or 0.25
-        nopat = operating_income * (1 - tax_rate)
-        invested_capital = total_equity + total_debt
+    @memoize_on_instance
+    def calculate_roic(self) -> float:
+        values = self._values
+        tax_rate = self.calculate_effective_tax_rate()
+        if tax_rate != tax_rate or tax_rate == 0:
+            tax_rate = 0.25
+        nopat = values["operating_income"] * (1 - tax_rate)
+        invested_capital = values["total_equity"] + values["total_liabilities"]
 
-        return self.calculate_margin(nopat, invested_capital)
+        return _kernels.safe_div(nopat, invested_capital)
 
     # Leverage and Coverage Metrics
-    @handle_api_errors
-    def calculate_debt_to_equity(self) -> Optional[float]:
-        return self.calculate_margin(
-            self.get_total_liabilities(), self.get_total_equity()
-        )
+    def calculate_debt_to_equity(self) -> float:
+        return self.all_margins()["debt_to_equity"]
 
-    @handle_api_errors
-    def calculate_interest_coverage(self) -> Optional[float]:
-        return self.calculate_margin(
-            self.get_operating_income(), self.get_interest_expense()
-        )
+    def calculate_interest_coverage(self) -> float:
+        return self.all_margins()["interest_coverage"]
 
     # Market Metrics
     def calculate_pe_ratio(self) -> Optional[float]:
-        return self._get_info_value("trailingPE")
+        return self.info.trailingPE
 
-    @handle_api_errors
-    def calculate_peg_ratio(self) -> Optional[float]:
-        return self.calculate_margin(
-            self._get_info_value("trailingPE"),
-            self._get_info_value("earningsQuarterlyGrowth"),
-        )
+    def calculate_peg_ratio(self) -> float:
+        return self.all_margins()["peg_ratio"]
 
-    @handle_api_errors
-    def calculate_forward_pe(self) -> Optional[float]:
-        return self.calculate_margin(
-            self._get_info_value("currentPrice"), self._get_info_value("forwardEps")
-        )
+    def calculate_forward_pe(self) -> float:
+        return self.all_margins()["forward_pe"]
 
-    @handle_api_errors
-    def calculate_price_to_sales(self) -> Optional[float]:
-        return self.calculate_margin(
-            self._get_info_value("marketCap"), self.get_revenue()
-        )
+    def calculate_price_to_sales(self) -> float:
+        return self.all_margins()["price_to_sales"]
 
     def calculate_price_to_book(self) -> Optional[float]:
-        return self._get_info_value("priceToBook")
+        return self.info.priceToBook
 
-    @handle_api_errors
-    def calculate_price_to_free_cash_flow(self) -> Optional[float]:
-        return self.calculate_margin(
-            self._get_info_value("marketCap"), self.calculate_free_cash_flow()
-        )
+    def calculate_price_to_free_cash_flow(self) -> float:
+        return self.all_margins()["price_to_free_cash_flow"]
 
-    @handle_api_errors
-    def calculate_ev_to_ebitda(self) -> Optional[float]:
-        return self.calculate_margin(
-            self._get_info_value("enterpriseValue"),
-            self._get_financials_value(["EBITDA"]),
-        )
+    def calculate_ev_to_ebitda(self) -> float:
+        return self.all_margins()["ev_to_ebitda"]
 
     # Growth and Value Metrics
-    @handle_api_errors
-    def calculate_sustainable_growth_rate(self) -> Optional[float]:
-        return self.calculate_margin(
-            self.calculate_roe(),
-            1 - self._get_info_value("payoutRatio"),
+    @memoize_on_instance
+    def calculate_sustainable_growth_rate(self) -> float:
+        return _kernels.safe_div(
+            self.calculate_roe(), 1 - _to_float(self.info.payoutRatio)
         )
 
-    @handle_api_errors
-    def calculate_altman_z_score(self) -> Optional[float]:
-        total_assets = self.get_total_assets()
-        if not total_assets:
-            return None
-
-        metrics = {
-            "working_capital": self._get_balance_sheet_value(["Working Capital"]),
-            "retained_earnings": self._get_balance_sheet_value(["Retained Earnings"]),
-            "operating_income": self.get_operating_income(),
-            "market_cap": self._get_info_value("marketCap"),
-            "total_liabilities": self.get_total_liabilities(),
-            "revenue": self.get_revenue(),
-        }
-
-        if not all(metrics.values()):
-            return None
-
-        coefficients = {
-            "working_capital": 1.2,
-            "retained_earnings": 1.4,
-            "operating_income": 3.3,
-            "market_cap": 0.6,
-            "revenue": 1.0,
-        }
-
-        z_score = sum(
-            coefficients[metric] * (value / total_assets)
-            for metric, value in metrics.items()
-            if metric != "total_liabilities"
+    @memoize_on_instance
+    def calculate_altman_z_score(self) -> float:
+        values = self._values
+        market_cap = _to_float(self.info.marketCap)
+        inputs = (
+            values["working_capital"],
+            values["retained_earnings"],
+            values["operating_income"],
+            values["revenue"],
+            values["total_assets"],
+            values["total_liabilities"],
+            market_cap,
         )
-        z_score += (
-            coefficients["market_cap"]
-            * metrics["market_cap"]
-            / metrics["total_liabilities"]
+        # Missing inputs propagate as NaN; zeros make the score meaningless.
+        if not all(inputs):
+            return math.nan
+
+        return float(
+            altman_z_score(
+                inputs[:4],
+                values["total_assets"],
+                market_cap,
+                values["total_liabilities"],
+            )
         )
 
-        return z_score
-
     # Other Metrics
     def calculate_dividend_yield(self) -> Optional[float]:
-        return self._get_info_value("dividendYield")
+        return self.info.dividendYield
 
     def calculate_payout_ratio(self) -> Optional[float]:
-        return self._get_info_value("payoutRatio")
+        return self.info.payoutRatio
 
-    @handle_api_errors
-    def calculate_asset_turnover_ratio(self) -> Optional[float]:
-        return self.calculate_margin(self.get_revenue(), self.get_total_assets())
+    def calculate_asset_turnover_ratio(self) -> float:
+        return self.all_margins()["asset_turnover"]
 
-    @handle_api_errors
-    def calculate_free_cash_flow(self) -> Optional[float]:
-        operating_cash_flow = self.get_operating_cash_flow()
-        capital_expenditures = self.get_capital_expenditures()
+    @memoize_on_instance
+    def calculate_free_cash_flow(self) -> float:
+        return self._values["operating_cash_flow"] - self._values["capital_expenditures"]
 
-        if any(x is None for x in [operating_cash_flow, capital_expenditures]):
-            return None
-
-        return operating_cash_flow - capital_expenditures
-
-    @handle_api_errors
-    def calculate_effective_tax_rate(self) -> Optional[float]:
-        return self.calculate_margin(
-            self._get_cashflow_value(["Tax Paid"]),
-            self._get_financials_value(["Income Before Tax"]),
+    @memoize_on_instance
+    def calculate_effective_tax_rate(self) -> float:
+        return _kernels.safe_div(
+            self._values["tax_paid"], self._values["income_before_tax"]
         )
+
+    # Metric name -> unbound method, for callers that compute a subset of
+    # metrics without going through getattr: METRICS["roe"](calc).
+    # A name that is also a column of `batch` is the same metric there.
+    # pe_ratio, price_to_book, dividend_yield and payout_ratio have no batch
+    # column, and batch adds earnings_yield and current_ratio.
+    METRICS = MappingProxyType(
+        {
+            "gross_margin": calculate_gross_margin,
+            "operating_margin": calculate_operating_margin,
+            "net_profit_margin": calculate_net_profit_margin,
+            "roa": calculate_roa,
+            "roe": calculate_roe,
+            "roic": calculate_roic,
+            "debt_to_equity": calculate_debt_to_equity,
+            "interest_coverage": calculate_interest_coverage,
+            "pe_ratio": calculate_pe_ratio,
+            "peg_ratio": calculate_peg_ratio,
+            "forward_pe": calculate_forward_pe,
+            "price_to_sales": calculate_price_to_sales,
+            "price_to_book": calculate_price_to_book,
+            "price_to_free_cash_flow": calculate_price_to_free_cash_flow,
+            "ev_to_ebitda": calculate_ev_to_ebitda,
+            "sustainable_growth_rate": calculate_sustainable_growth_rate,
+            "altman_z_score": calculate_altman_z_score,
+            "dividend_yield": calculate_dividend_yield,
+            "payout_ratio": calculate_payout_ratio,
+            "asset_turnover": calculate_asset_turnover_ratio,
+            "free_cash_flow": calculate_free_cash_flow,
+            "effective_tax_rate": calculate_effective_tax_rate,
+        }
+    )
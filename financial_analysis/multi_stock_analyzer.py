@@ -1,62 +1,312 @@
-import pandas as pd
+from __future__ import annotations
+
+import asyncio
+import functools
+import math
 from .stock_analyzer import StockAnalyzer
+from .metrics_calculator import MetricsCalculator
 import concurrent.futures
-from .finance_client import FinanceClient
+from .finance_client import FinanceClient, _get_session
+from .risk_metrics_calculator import (
+    risk_metrics_matrix,
+    _daily_index,
+    _daily_returns,
+    _read_cached_history,
+    _write_cached_history,
+)
 import logging
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
+
+# pandas and yfinance are imported on first use, as in finance_client, so that
+# importing the package stays cheap.
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Benchmark for the risk metrics' beta and correlation
+_MARKET_INDEX = "^GSPC"
+
+
+def _run_sync(coro):
+    """
+    Run `coro` to completion from synchronous code.
+
+    asyncio.run refuses to start inside a running event loop (a Jupyter cell,
+    an async application), so there the coroutine gets its own loop on a
+    worker thread and the caller blocks until it finishes.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+def _analyze_one(
+    ticker: str,
+    data: Optional[tuple],
+    analyzers: Optional[Dict[str, StockAnalyzer]] = None,
+    price_history: Optional[pd.DataFrame] = None,
+    market_history: Optional[pd.DataFrame] = None,
+) -> dict:
+    """
+    Analyze a single stock from its prefetched financial data.
+
+    When `analyzers` is given, a StockAnalyzer already built for the ticker is
+    reused and `data` is ignored; newly built ones with data are added. The
+    optional price histories are handed to the risk calculator, which
+    otherwise fetches them itself.
+    Errors are returned as {"Ticker": ticker, "Error": ...} rather than raised so
+    that one failing ticker does not abort a pool of workers.
+    """
+    try:
+        analyzer = analyzers.get(ticker) if analyzers is not None else None
+        if analyzer is None:
+            balance_sheet, financials, cashflow, info = data
+
+            # Log the data for debugging
+            logger.debug(
+                f"Analyzing {ticker}: balance_sheet rows: {len(balance_sheet)}, financials rows: {len(financials)}, cashflow rows: {len(cashflow)}"
+            )
+
+            # Proceed with analysis and handle partial data
+            analyzer = StockAnalyzer(
+                ticker,
+                balance_sheet,
+                financials,
+                cashflow,
+                info,
+                price_history=price_history,
+                market_history=market_history,
+            )
+            # Only keep complete fetches so that failed tickers are retried next time
+            if analyzers is not None and (balance_sheet or financials or cashflow):
+                analyzers[ticker] = analyzer
+        return analyzer.get_metrics()
+
+    except Exception as e:
+        logger.error(f"Error analyzing {ticker}: {e}")
+        return {"Ticker": ticker, "Error": str(e)}
 
 
 class MultiStockAnalyzer:
-    def __init__(self, tickers: list):
+    def __init__(
+        self,
+        tickers: list,
+        analyzers: Optional[Dict[str, StockAnalyzer]] = None,
+        priority: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Args:
+        tickers (list): The stock ticker symbols to analyze.
+        analyzers (dict): Optional ticker -> StockAnalyzer cache to share with
+            other MultiStockAnalyzers, so tickers already analyzed by one of them
+            are not fetched again.
+        priority (dict): Optional ticker -> expected fetch time, e.g. the
+            `latencies` of an earlier run. Slower tickers are fetched first so
+            they do not extend the tail; the report keeps the order of `tickers`.
+        """
         self.tickers = tickers
+        self.priority = priority or {}
         self.client = FinanceClient(tickers)  # Initialize with batch tickers
+        # Analyzers by ticker, reused by later analyze_stocks calls
+        self._analyzers: Dict[str, StockAnalyzer] = (
+            analyzers if analyzers is not None else {}
+        )
+
+    @property
+    def latencies(self) -> Dict[str, float]:
+        """Seconds taken to fetch the statements of each ticker fetched so far."""
+        return self.client.latencies
+
+    def _prefetch(self, tickers: list) -> Dict[str, tuple]:
+        """Fetch the financial data, with retry logic, of every ticker without a cached analyzer."""
+        missing = [ticker for ticker in tickers if ticker not in self._analyzers]
+        return self.client.get_many(missing) if missing else {}
+
+    async def _prefetch_all(
+        self, tickers: list
+    ) -> Tuple[Dict[str, tuple], Dict[str, pd.DataFrame], Optional[pd.DataFrame]]:
+        """
+        Fetch the statements and the price history of `tickers`, running both
+        fetches concurrently on one event loop.
+
+        Returns:
+        Tuple: ticker -> financial data, ticker -> price history, S&P 500 history
+        """
+        if not tickers:
+            return {}, {}, None
+        data, (histories, market_history) = await asyncio.gather(
+            self.client.get_many_async(tickers),
+            asyncio.to_thread(self._prefetch_history, tickers),
+        )
+        return data, histories, market_history
+
+    def _prefetch_history(
+        self, tickers: list
+    ) -> Tuple[Dict[str, pd.DataFrame], Optional[pd.DataFrame]]:
+        """
+        Load one year of prices for `tickers` and the S&P 500.
+
+        Histories cached today are read from the Parquet cache; the remaining
+        symbols are downloaded in a single batch and written back to it.
+
+        Returns:
+        Tuple: ticker -> price history, and the S&P 500 history. Tickers missing
+        from the download are left out so that their risk calculator falls back
+        to fetching on its own.
+        """
+        if not tickers:
+            return {}, None
+        symbols = list(dict.fromkeys(tickers + [_MARKET_INDEX]))
+        histories = {}
+        for symbol in symbols:
+            history = _read_cached_history(symbol, "1y")
+            if history is not None:
+                histories[symbol] = history
+        stale = [symbol for symbol in symbols if symbol not in histories]
+        if stale:
+            histories.update(self._download_history(stale))
+        return histories, histories.pop(_MARKET_INDEX, None)
+
+    @staticmethod
+    def _download_history(symbols: list) -> Dict[str, pd.DataFrame]:
+        """Download one year of prices for `symbols` in a single batch and cache them."""
+        import yfinance as yf
 
-    def analyze_stock(self, ticker):
-        """Analyze a single stock and return the metrics."""
         try:
-            # Fetch all data with retry logic
-            balance_sheet, financials, cashflow, info = self.client.get_financial_data(
-                ticker
+            # auto_adjust matches the adjusted closes of yf.Ticker.history
+            prices = yf.download(
+                symbols,
+                period="1y",
+                group_by="ticker",
+                auto_adjust=True,
+                threads=True,
+                progress=False,
+                session=_get_session(),
             )
+        except Exception as e:
+            logger.warning(f"Batched price download failed: {e}")
+            return {}
 
-            # Log the data for debugging
-            logging.debug(
-                f"Analyzing {ticker}: balance_sheet size: {balance_sheet.shape}, financials size: {financials.shape}, cashflow size: {cashflow.shape}"
+        histories = {}
+        for symbol in symbols:
+            if symbol in prices.columns.get_level_values(0):
+                history = _daily_index(prices[symbol].dropna(how="all"))
+                if not history.empty:
+                    _write_cached_history(symbol, "1y", history)
+                    histories[symbol] = history
+        return histories
+
+    def analyze_stock(self, ticker):
+        """Analyze a single stock and return the metrics."""
+        data = self._prefetch([ticker])
+        return _analyze_one(ticker, data.get(ticker), self._analyzers)
+
+    def _analyze_all(
+        self,
+        data: Dict[str, tuple],
+        histories: Dict[str, pd.DataFrame],
+        market_history: Optional[pd.DataFrame],
+    ) -> list:
+        """Analyze every ticker from the prefetched data, in the order of self.tickers."""
+        # Tickers missing from the prefetch still fetch on their own, so threads
+        # scale with the ticker count; map keeps the rows in the order the
+        # tickers were given.
+        workers = max(1, min(32, len(self.tickers)))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            analyze = functools.partial(
+                _analyze_one,
+                analyzers=self._analyzers,
+                market_history=market_history,
+            )
+            return list(
+                executor.map(
+                    lambda ticker: analyze(
+                        ticker, data.get(ticker), price_history=histories.get(ticker)
+                    ),
+                    self.tickers,
+                )
             )
 
-            # Proceed with analysis and handle partial data
-            analyzer = StockAnalyzer(ticker, balance_sheet, financials, cashflow, info)
-            return analyzer.get_metrics()
+    @staticmethod
+    def _to_frame(results: list) -> pd.DataFrame:
+        """Assemble the per-ticker result dicts into the rounded report DataFrame."""
+        import pandas as pd
 
-        except Exception as e:
-            logging.error(f"Error analyzing {ticker}: {e}")
-            return {"Ticker": ticker, "Error": str(e)}
+        # Convert the results into a DataFrame column by column; error rows lack
+        # the metric keys, so absent entries are filled with NaN.
+        labels = dict.fromkeys(label for result in results for label in result)
+        df = pd.DataFrame(
+            {
+                label: [result.get(label, math.nan) for result in results]
+                for label in labels
+            }
+        )
+
+        # Round all numeric columns to 4 decimal places; round leaves the
+        # non-numeric columns untouched
+        return df.round(4)
+
+    async def analyze_stocks_async(self) -> pd.DataFrame:
+        """
+        Asynchronous variant of analyze_stocks for callers already running an
+        event loop; the fetches are awaited and the analysis runs in a worker
+        thread, so the loop is never blocked.
+        """
+        # All statements are fetched up front on the event loop, alongside one
+        # batched price download for the risk metrics that includes the market
+        # index only once.
+        missing = [ticker for ticker in self.tickers if ticker not in self._analyzers]
+        # Longest expected fetch first; unknown tickers keep their relative order
+        missing.sort(key=lambda ticker: self.priority.get(ticker, 0.0), reverse=True)
+        data, histories, market_history = await self._prefetch_all(missing)
+        results = await asyncio.to_thread(
+            self._analyze_all, data, histories, market_history
+        )
+        return self._to_frame(results)
 
     def analyze_stocks(self):
         """Analyze multiple stocks in parallel and return a DataFrame with the specified metrics."""
-        results = []
-
-        # Use ThreadPoolExecutor to analyze each stock in parallel
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future_to_ticker = {
-                executor.submit(self.analyze_stock, ticker): ticker
-                for ticker in self.tickers
-            }
+        return _run_sync(self.analyze_stocks_async())
 
-            # Collect results as they are completed
-            for future in concurrent.futures.as_completed(future_to_ticker):
-                ticker = future_to_ticker[future]
-                try:
-                    result = future.result()
-                    results.append(result)
-                except Exception as e:
-                    logging.error(f"Error analyzing {ticker}: {e}")
-                    results.append({"Ticker": ticker, "Error": str(e)})
+    @staticmethod
+    def _compute_all_risk(
+        histories: Dict[str, pd.DataFrame], market_history: pd.DataFrame
+    ) -> pd.DataFrame:
+        """Risk metrics of every ticker in `histories` from one (tickers x days) return matrix."""
+        import pandas as pd
 
-        # Convert the results list into a DataFrame
-        df = pd.DataFrame(results)
+        # Returns are taken on each series' own calendar before aligning, so a
+        # date only another ticker traded leaves a gap instead of voiding the
+        # next return; the metrics then match analyze_stocks.
+        returns = pd.DataFrame(
+            {ticker: _daily_returns(history) for ticker, history in histories.items()}
+        )
+        market_returns = _daily_returns(market_history).reindex(returns.index)
+        return pd.DataFrame(
+            risk_metrics_matrix(returns.to_numpy().T, market_returns.to_numpy()),
+            index=returns.columns,
+        )
 
-        # Round all numeric columns to 4 decimal places
-        numeric_columns = df.select_dtypes(include=["float64", "int64"]).columns
-        df[numeric_columns] = df[numeric_columns].round(4)
+    def analyze_stocks_vectorized(self) -> pd.DataFrame:
+        """
+        Compute the metrics of all tickers at once with column operations.
 
-        return df
+        Unlike analyze_stocks this skips the per-ticker StockAnalyzer: the
+        MetricsCalculator.batch columns come from one vectorized pass and the
+        risk metrics from one return matrix, indexed by ticker.
+        """
+        data, histories, market_history = _run_sync(
+            self._prefetch_all(list(self.tickers))
+        )
+        balance_sheets, financials, cashflows, infos = (
+            {ticker: fetched[i] for ticker, fetched in data.items()} for i in range(4)
+        )
+        df = MetricsCalculator.bulk(balance_sheets, financials, cashflows, infos)
+        if histories and market_history is not None:
+            risk = self._compute_all_risk(histories, market_history)
+            df = df.join(risk)
+        return df.round(4)
@@ -1,10 +1,221 @@
-from dataclasses import dataclass
-from typing import Optional, Dict, Any
+from __future__ import annotations
+
+import functools
+import logging
+import os
+import warnings
+from datetime import date
+from statistics import NormalDist
+from typing import Dict, Optional, TYPE_CHECKING
 import numpy as np
-import pandas as pd
-from scipy import stats
-import yfinance as yf
+from .finance_client import _get_session
 from .utils import handle_api_errors
+from . import _kernels
+
+# pandas and yfinance are imported on first use, as in finance_client, so that
+# importing the package stays cheap.
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=32)
+def _z_score(confidence_level: float) -> float:
+    """Standard normal quantile for the parametric VaR, shared by all calculators."""
+    # statistics.NormalDist gives the same quantile as scipy.stats.norm.ppf
+    # without importing SciPy.
+    return NormalDist().inv_cdf(1 - confidence_level)
+
+
+@functools.lru_cache(maxsize=32)
+def _daily_risk_free(risk_free_rate: float) -> float:
+    """Daily rate compounding to the annual `risk_free_rate` over 252 trading days."""
+    return (1 + risk_free_rate) ** (1 / 252) - 1
+
+
+# Labels of the risk metrics, in the order produced by _kernels.risk.
+RISK_LABELS = (
+    "Value at Risk (Historical)",
+    "Value at Risk (Parametric)",
+    "Conditional VaR",
+    "Sharpe Ratio",
+    "Sortino Ratio",
+    "Beta",
+    "Market Correlation",
+)
+
+
+def risk_metrics_matrix(
+    returns: np.ndarray,
+    market: np.ndarray,
+    confidence_level: float = 0.95,
+    risk_free_rate: float = 0.02,
+) -> Dict[str, np.ndarray]:
+    """
+    Compute the risk metrics of many tickers at once with axis reductions.
+
+    Args:
+    returns (np.ndarray): Daily returns shaped (N tickers, T days) on a shared
+        date axis, NaN on days a ticker has no return.
+    market (np.ndarray): S&P 500 daily returns shaped (T,), NaN where missing.
+
+    Returns:
+    Dict: RISK_LABELS label -> array of shape (N,), NaN where undefined.
+    """
+    present = ~np.isnan(returns)
+    daily_rf = _daily_risk_free(risk_free_rate)
+    annualize = np.sqrt(252)
+
+    with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+        # All-NaN rows (tickers without history) reduce to NaN with a warning
+        warnings.simplefilter("ignore", RuntimeWarning)
+        means = np.nanmean(returns, axis=1)
+        stds = np.nanstd(returns, axis=1, ddof=1)
+        var_historical = np.nanpercentile(
+            returns, (1 - confidence_level) * 100, axis=1
+        )
+
+        tail = returns <= var_historical[:, None]
+        cvar = np.where(tail, returns, 0.0).sum(axis=1) / tail.sum(axis=1)
+
+        excess = returns - daily_rf
+        downside = excess < 0
+        downside_std = np.sqrt(
+            np.where(downside, excess * excess, 0.0).sum(axis=1) / downside.sum(axis=1)
+        )
+        excess_mean = means - daily_rf
+
+        # Beta and correlation over the days both the ticker and the market traded
+        both = present & ~np.isnan(market)
+        count = both.sum(axis=1)
+        stock_dev = np.where(both, returns, 0.0)
+        stock_dev = np.where(
+            both, stock_dev - (stock_dev.sum(axis=1) / count)[:, None], 0.0
+        )
+        market_dev = np.where(both, market, 0.0)
+        market_dev = np.where(
+            both, market_dev - (market_dev.sum(axis=1) / count)[:, None], 0.0
+        )
+        covariance = (stock_dev * market_dev).sum(axis=1)
+        stock_ss = (stock_dev * stock_dev).sum(axis=1)
+        market_ss = (market_dev * market_dev).sum(axis=1)
+
+        values = (
+            var_historical,
+            means - _z_score(confidence_level) * stds,
+            cvar,
+            annualize * excess_mean / stds,
+            annualize * excess_mean / downside_std,
+            covariance / market_ss,
+            covariance / np.sqrt(stock_ss * market_ss),
+        )
+    return dict(zip(RISK_LABELS, values))
+
+
+def compute_risk_metrics(
+    returns: np.ndarray,
+    aligned_returns: np.ndarray,
+    aligned_market: np.ndarray,
+    confidence_level: float = 0.95,
+    risk_free_rate: float = 0.02,
+) -> Dict[str, float]:
+    """
+    Compute the risk metrics of one stock from its daily returns.
+
+    Args:
+    returns (np.ndarray): The stock's daily returns, without missing days.
+    aligned_returns, aligned_market (np.ndarray): Stock and S&P 500 returns on
+        the days both traded, for beta and correlation.
+
+    Returns:
+    Dict: RISK_LABELS label -> value, or {} when there are no returns.
+    """
+    if not returns.size:
+        return {}
+    # VaR, CVaR, Sharpe, Sortino, beta and correlation in one compiled pass;
+    # std uses ddof=1 like pandas.
+    values = _kernels.risk(
+        returns,
+        aligned_returns,
+        aligned_market,
+        (1 - confidence_level) * 100,
+        _z_score(confidence_level),
+        _daily_risk_free(risk_free_rate),
+    )
+    return dict(zip(RISK_LABELS, values))
+
+
+# Daily price histories are cached here as Parquet (Close column only) for the
+# rest of the day; set YF_NO_CACHE to always fetch fresh data.
+_HISTORY_CACHE_DIR = ".cache"
+
+
+def _daily_index(history: pd.DataFrame) -> pd.DataFrame:
+    """
+    `history` indexed by timezone-naive dates, so that histories from
+    yf.Ticker.history (exchange-local timestamps), yf.download and the cache
+    align with each other.
+    """
+    index = history.index
+    if getattr(index, "tz", None) is not None:
+        history = history.set_axis(index.tz_localize(None).normalize())
+    return history
+
+
+def _daily_returns(history: pd.DataFrame) -> pd.Series:
+    """Close-to-close returns over the days `history` itself has a close."""
+    return history["Close"].dropna().pct_change().dropna()
+
+
+def _history_cache_path(symbol: str, period: str) -> str:
+    return os.path.join(_HISTORY_CACHE_DIR, f"{symbol}_{period}.parquet")
+
+
+def _read_cached_history(symbol: str, period: str) -> Optional[pd.DataFrame]:
+    """Price history of `symbol` from the Parquet cache, or None when missing or stale."""
+    path = _history_cache_path(symbol, period)
+    if (
+        os.environ.get("YF_NO_CACHE")
+        or not os.path.exists(path)
+        or date.fromtimestamp(os.path.getmtime(path)) != date.today()
+    ):
+        return None
+    import pandas as pd
+
+    try:
+        return pd.read_parquet(path, columns=["Close"])
+    except Exception as e:
+        logger.debug(f"Ignoring unreadable price cache {path}: {e}")
+        return None
+
+
+def _write_cached_history(symbol: str, period: str, history: pd.DataFrame) -> None:
+    """Store the Close column of a freshly downloaded history in the Parquet cache."""
+    if os.environ.get("YF_NO_CACHE") or history.empty:
+        return
+    try:
+        os.makedirs(_HISTORY_CACHE_DIR, exist_ok=True)
+        history[["Close"]].to_parquet(_history_cache_path(symbol, period))
+    except Exception as e:
+        # No Parquet engine installed or the directory is not writable
+        logger.debug(f"Not caching price history for {symbol}: {e}")
+
+
+def _load_history(symbol: str, period: str) -> pd.DataFrame:
+    """Price history of `symbol`, read from the Parquet cache when it was written today."""
+    history = _read_cached_history(symbol, period)
+    if history is not None:
+        return history
+    import yfinance as yf
+
+    # Pooled keep-alive connections shared with FinanceClient, built only
+    # when something is actually downloaded
+    history = _daily_index(
+        yf.Ticker(symbol, session=_get_session()).history(period=period)
+    )
+    _write_cached_history(symbol, period, history)
+    return history
 
 
 class RiskMetricsCalculator:
@@ -14,29 +225,46 @@ class RiskMetricsCalculator:
         confidence_level: float = 0.95,
         risk_free_rate: float = 0.02,
         period: str = "1y",
+        price_history: Optional[pd.DataFrame] = None,
+        market_history: Optional[pd.DataFrame] = None,
     ):
+        """
+        Args:
+        price_history, market_history (pd.DataFrame): Optional prefetched price
+            history (with a "Close" column) of the stock and of the S&P 500 over
+            `period`; whichever is missing is fetched on first use.
+        """
         self.ticker = ticker
         self.confidence_level = confidence_level
         self.risk_free_rate = risk_free_rate
         self.period = period
-        self._price_history = None
-        self._market_data = None
+        self._price_history = price_history
+        self._market_data = market_history
         self._daily_returns = None
         self._market_returns = None
+        self._aligned_returns = None
+        self._aligned_market = None
 
     def _fetch_data(self) -> None:
         """Fetch historical price data for stock and market index."""
-        if self._price_history is None:
+        if self._daily_returns is None:
             try:
-                stock = yf.Ticker(self.ticker)
-                market = yf.Ticker("^GSPC")  # S&P 500
-
-                self._price_history = stock.history(period=self.period)
-                self._market_data = market.history(period=self.period)
+                if self._price_history is None:
+                    self._price_history = _load_history(self.ticker, self.period)
+                if self._market_data is None:
+                    # S&P 500
+                    self._market_data = _load_history("^GSPC", self.period)
 
                 # Calculate returns
-                self._daily_returns = self._price_history["Close"].pct_change().dropna()
-                self._market_returns = self._market_data["Close"].pct_change().dropna()
+                self._daily_returns = _daily_returns(self._price_history)
+                self._market_returns = _daily_returns(self._market_data)
+
+                # Stock and market returns on the days both traded, for beta
+                common = self._daily_returns.index.intersection(
+                    self._market_returns.index
+                )
+                self._aligned_returns = self._daily_returns.loc[common].to_numpy()
+                self._aligned_market = self._market_returns.loc[common].to_numpy()
 
             except Exception as e:
                 raise ValueError(f"Failed to fetch data for {self.ticker}: {e}")
@@ -46,50 +274,12 @@ class RiskMetricsCalculator:
         """Calculate all risk metrics for the stock."""
         self._fetch_data()
 
-        if self._daily_returns is None or self._daily_returns.empty:
+        if self._daily_returns is None:
             return {}
-
-        # Historical VaR
-        var_historical = np.percentile(
-            self._daily_returns, (1 - self.confidence_level) * 100
+        return compute_risk_metrics(
+            self._daily_returns.to_numpy(),
+            self._aligned_returns,
+            self._aligned_market,
+            self.confidence_level,
+            self.risk_free_rate,
         )
-
-        # Parametric VaR
-        z_score = stats.norm.ppf(1 - self.confidence_level)
-        var_parametric = (
-            self._daily_returns.mean() - z_score * self._daily_returns.std()
-        )
-
-        # CVaR
-        tail_returns = self._daily_returns[self._daily_returns <= var_historical]
-        cvar = tail_returns.mean()
-
-        # Sharpe Ratio
-        daily_rf = (1 + self.risk_free_rate) ** (1 / 252) - 1
-        excess_returns = self._daily_returns - daily_rf
-        sharpe = np.sqrt(252) * (excess_returns.mean() / excess_returns.std())
-
-        # Sortino Ratio
-        negative_returns = excess_returns[excess_returns < 0]
-        downside_std = np.sqrt(np.mean(negative_returns**2))
-        sortino = np.sqrt(252) * (excess_returns.mean() / downside_std)
-
-        # Beta and Correlation
-        aligned_returns = pd.concat(
-            [self._daily_returns, self._market_returns], axis=1
-        ).dropna()
-
-        covariance = aligned_returns.cov().iloc[0, 1]
-        market_variance = aligned_returns.iloc[:, 1].var()
-        beta = covariance / market_variance
-        correlation = aligned_returns.corr().iloc[0, 1]
-
-        return {
-            "Value at Risk (Historical)": var_historical,
-            "Value at Risk (Parametric)": var_parametric,
-            "Conditional VaR": cvar,
-            "Sharpe Ratio": sharpe,
-            "Sortino Ratio": sortino,
-            "Beta": beta,
-            "Market Correlation": correlation,
-        }
@@ -1,5 +1,8 @@
+import functools
 import logging
 
+logger = logging.getLogger(__name__)
+
 
 def handle_api_errors(func):
     """Decorator to handle API errors gracefully and log them."""
@@ -8,13 +11,27 @@ def handle_api_errors(func):
         try:
             return func(*args, **kwargs)
         except KeyError as e:
-            logging.error(f"KeyError in function '{func.__name__}': {e}")
+            logger.error(f"KeyError in function '{func.__name__}': {e}")
             return None
         except ValueError as e:
-            logging.error(f"ValueError in function '{func.__name__}': {e}")
+            logger.error(f"ValueError in function '{func.__name__}': {e}")
             return None
         except Exception as e:
-            logging.error(f"An error occurred in function '{func.__name__}': {e}")
+            logger.error(f"An error occurred in function '{func.__name__}': {e}")
             return None
 
     return wrapper
+
+
+def memoize_on_instance(func):
+    """Decorator caching the result of an argument-less method in the instance's `_cache` dict."""
+
+    @functools.wraps(func)
+    def wrapper(self):
+        try:
+            return self._cache[func.__name__]
+        except KeyError:
+            result = self._cache[func.__name__] = func(self)
+            return result
+
+    return wrapper
@@ -1,47 +1,267 @@
+import argparse
+import asyncio
+import json
 import logging
+import os
+import sys
+from datetime import date
+from financial_analysis.finance_client import FinanceClient
 from financial_analysis.multi_stock_analyzer import MultiStockAnalyzer
 
+# Tickers analyzed when none are given on the command line
+DEFAULT_TICKERS = [
+    "AAPL",
+    "ADBE",
+    "AMZN",
+    "BRK.B",
+    "COST",
+    "GOOG",
+    "INTC",
+    "META",
+    "MSFT",
+    "NFLX",
+    "NVDA",
+    "RIVN",
+    "TSM",
+    "UBER",
+]
 
-def setup_logging():
-    """Configure logging to write to stdout."""
-    logging.basicConfig(
-        level=logging.ERROR, format="%(asctime)s - %(levelname)s - %(message)s"
+_LOG_FORMATTER = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+
+logger = logging.getLogger(__name__)
+
+# Per-ticker fetch times of earlier runs, used to dispatch the slowest first
+LATENCY_FILE = "ticker_latency.json"
+
+
+def setup_logging(verbose: bool = False):
+    """
+    Configure logging: silent by default, written to stderr with --verbose.
+
+    The NullHandler keeps the package's per-ticker log calls from reaching any
+    stream unless output was asked for. With --verbose only this script and
+    the financial_analysis package log at DEBUG; third-party libraries
+    (yfinance, urllib3, numba, ...) still only report warnings.
+    """
+    root = logging.getLogger()
+    if verbose:
+        handler = logging.StreamHandler()
+        handler.setFormatter(_LOG_FORMATTER)
+        root.addHandler(handler)
+        root.setLevel(logging.WARNING)
+        for name in ("financial_analysis", __name__):
+            logging.getLogger(name).setLevel(logging.DEBUG)
+    else:
+        root.addHandler(logging.NullHandler())
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Analyze a list of stocks.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "--tickers",
+        help="comma-separated ticker symbols, e.g. AAPL,MSFT (default: a built-in list)",
+    )
+    source.add_argument(
+        "--tickers-file",
+        help="file of ticker symbols separated by whitespace or newlines",
+    )
+    parser.add_argument(
+        "--valid-tickers",
+        help="file of known-good symbols; other tickers are dropped before fetching",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="output path (default: stock_analysis.<format>)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("csv", "parquet"),
+        default="csv",
+        help="output file format (parquet needs pyarrow or fastparquet)",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="ignore the on-disk Yahoo response and price caches and fetch fresh data",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="after the first run, keep reading ticker lists (one per line) from "
+        "stdin and analyze each in this process, reusing data fetched the same "
+        "day; batch N is written to the output path with -N before the extension",
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="log progress and errors"
+    )
+    return parser.parse_args(argv)
+
+
+def load_tickers(args: argparse.Namespace) -> list:
+    """Tickers from --tickers or --tickers-file, else DEFAULT_TICKERS, deduplicated."""
+    if args.tickers:
+        tickers = args.tickers.split(",")
+    elif args.tickers_file:
+        with open(args.tickers_file) as f:
+            tickers = f.read().split()
+    else:
+        tickers = DEFAULT_TICKERS
+    return normalize_tickers(tickers)
+
+
+def normalize_tickers(tickers: list) -> list:
+    """Upper-case the symbols and drop blanks and duplicates."""
+    tickers = [ticker.strip().upper() for ticker in tickers if ticker.strip()]
+    # Drop repeated symbols, keeping the first occurrence's position, so each
+    # ticker is fetched and reported once
+    return list(dict.fromkeys(tickers))
+
+
+def filter_valid(tickers: list, path: str) -> list:
+    """Keep the tickers listed in `path`, so unknown symbols never cost a Yahoo round trip."""
+    with open(path) as f:
+        valid = set(f.read().upper().split())
+    dropped = [ticker for ticker in tickers if ticker not in valid]
+    if dropped:
+        # Printed rather than logged: logging is silent unless --verbose
+        print(f"Skipping unknown tickers: {', '.join(dropped)}", file=sys.stderr)
+    return [ticker for ticker in tickers if ticker in valid]
+
+
+def write_atomically(path: str, write) -> None:
+    """
+    Call `write` with a temporary path next to `path`, then rename the file
+    over `path`, so readers see either the previous contents or the complete
+    new ones, never a truncated file.
+    """
+    # The process id keeps concurrent runs from writing the same temporary file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
 
 
-def main():
+def write_results(results_df, path: str, fmt: str) -> None:
+    """Write the results to `path` as CSV or Parquet, atomically."""
+    if fmt == "parquet":
+        # Columnar and compressed; written by the Arrow C++ writer
+        write_atomically(
+            path,
+            lambda tmp: results_df.to_parquet(tmp, index=False, compression="zstd"),
+        )
+    else:
+        write_atomically(path, lambda tmp: results_df.to_csv(tmp, index=False))
+
+
+def load_latencies(path: str = LATENCY_FILE) -> dict:
+    """Ticker -> seconds from earlier runs, or {} when there is no readable stats file."""
+    try:
+        with open(path) as f:
+            stats = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(stats, dict):
+        return {}
+    return {
+        ticker: seconds
+        for ticker, seconds in stats.items()
+        if isinstance(seconds, (int, float))
+    }
+
+
+def save_latencies(latencies: dict, path: str = LATENCY_FILE) -> None:
+    """Merge this run's fetch times into the stats file."""
+    stats = load_latencies(path)
+    stats.update((ticker, round(seconds, 3)) for ticker, seconds in latencies.items())
+
+    def dump(tmp: str) -> None:
+        with open(tmp, "w") as f:
+            json.dump(stats, f, indent=2, sort_keys=True)
+
+    try:
+        write_atomically(path, dump)
+    except OSError as e:
+        logger.debug(f"Not saving ticker latencies: {e}")
+
+
+def batch_path(path: str, batch: int) -> str:
+    """`path` for batch 0, else `path` with -<batch> before the extension."""
+    if not batch:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}-{batch}{ext}"
+
+
+async def analyze(
+    tickers: list, args: argparse.Namespace, analyzers: dict, batch: int = 0
+) -> None:
+    """Analyze `tickers`, print the results and write them to the output file."""
+    if args.valid_tickers:
+        tickers = filter_valid(tickers, args.valid_tickers)
+
+    # Initialize the MultiStockAnalyzer with the tickers; the slowest tickers
+    # of earlier runs are fetched first
+    analyzer = MultiStockAnalyzer(
+        tickers, analyzers=analyzers, priority=load_latencies()
+    )
+
+    # Analyze the stocks and return the results; all tickers are fetched
+    # concurrently on the event loop
+    results_df = await analyzer.analyze_stocks_async()
+    if analyzer.latencies:
+        save_latencies(analyzer.latencies)
+
+    # Print out the results; formatting the table is skipped when the output
+    # is piped or redirected, as in scheduled runs
+    if sys.stdout.isatty():
+        print(results_df)
+    else:
+        logger.info(f"Analyzed {len(results_df)} tickers")
+
+    output = args.output or f"stock_analysis.{args.format}"
+    write_results(results_df, batch_path(output, batch), args.format)
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+
     # Set up logging
-    setup_logging()
+    setup_logging(args.verbose)
+
+    # Responses are cached on disk across runs (see FinanceClient); the caches
+    # read this variable when they are first used.
+    if args.no_cache:
+        os.environ["YF_NO_CACHE"] = "1"
 
     # List of stock tickers to analyze
-    tickers = [
-        "AAPL",
-        "ADBE",
-        "AMZN",
-        "BRK.B",
-        "COST",
-        "GOOG",
-        "INTC",
-        "META",
-        "MSFT",
-        "NFLX",
-        "NVDA",
-        "RIVN",
-        "TSM",
-        "UBER",
-    ]
-
-    # Initialize the MultiStockAnalyzer with the tickers
-    analyzer = MultiStockAnalyzer(tickers)
-
-    # Analyze the stocks and return the results
-    results_df = analyzer.analyze_stocks()
-
-    # Print out the results
-    print(results_df)
-
-    results_df.to_csv("stock_analysis.csv", index=False)
+    tickers = load_tickers(args)
+
+    # Analyzers shared by every run in this process, kept for the current day
+    analyzers = {}
+    cache_day = date.today()
+    await analyze(tickers, args, analyzers)
+
+    if args.serve:
+        batch = 0
+        # readline runs in a worker thread so that the event loop stays free
+        while line := await asyncio.to_thread(sys.stdin.readline):
+            tickers = normalize_tickers(line.replace(",", " ").split())
+            if not tickers:
+                continue
+            if date.today() != cache_day:
+                # Fundamentals and prices fetched on an earlier day are stale
+                analyzers.clear()
+                FinanceClient.clear_cache()
+                cache_day = date.today()
+            batch += 1
+            await analyze(tickers, args, analyzers, batch)
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())